@@ -1,26 +1,94 @@
 import os
 import re
 import sys
+import heapq
+import stat
+import json
 import requests
+from collections import Counter, namedtuple
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from bs4 import BeautifulSoup
-from urllib.parse import unquote
+from functools import lru_cache
+from operator import itemgetter
+from lxml import etree
+from urllib.parse import unquote, urlsplit
 from colorama import init, Fore, Style
 from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import orjson as fast_json  # 可选依赖：解析 ld+json 更快；未安装时退回标准库
+except ImportError:
+    import json as fast_json
+
 init(autoreset=True)
 
+Issue = namedtuple('Issue', ('type', 'msg', 'deduct'))
+ParsedPage = namedtuple('ParsedPage', ('h1_count', 'has_schema', 'has_bread', 'hrefs', 'schema_texts'))
+
+class _PageCollector:
+    """lxml 解析器 target：只记录审计用到的字段，不生成 Element 树"""
+    _BREADCRUMB_RE = re.compile('breadcrumb', re.I)
+
+    def __init__(self, capture_schema=False):
+        self.h1_count = 0
+        self.has_schema = False
+        self.has_bread = False
+        self.hrefs = []
+        # 仅在需要校验 Schema 时才收集 ld+json 脚本内容
+        self.capture_schema = capture_schema
+        self.schema_texts = []
+        self._in_schema = False
+
+    def start(self, tag, attrib):
+        if tag == 'h1':
+            self.h1_count += 1
+        elif tag == 'script' and attrib.get('type') == 'application/ld+json':
+            self.has_schema = True
+            if self.capture_schema:
+                self._in_schema = True
+                self.schema_texts.append('')
+        elif tag == 'a' and attrib.get('href') is not None:
+            self.hrefs.append(attrib.get('href'))
+        if not self.has_bread and (attrib.get('aria-label') == 'breadcrumb' or self._BREADCRUMB_RE.search(attrib.get('class', ''))):
+            self.has_bread = True
+
+    def data(self, data):
+        if self._in_schema:
+            self.schema_texts[-1] += data
+
+    def end(self, tag):
+        if tag == 'script':
+            self._in_schema = False
+
+    def close(self):
+        return self
+
 class SiteAuditor:
-    def __init__(self, root_dir='.'):
+    def __init__(self, root_dir='.', validate_schema=False):
         self.root_dir = Path(root_dir).resolve()
+        self.validate_schema = validate_schema  # 可选：不仅检查 ld+json 是否存在，还检查 JSON 是否合法
         self.html_files = []
         self.base_url = None
         self.keywords = []
-        self.links_graph = {}  # target -> count
-        self.pages_data = {}   # path -> {title, h1, schema, links, ...}
+        self.links_graph = Counter()  # target -> count
+        self.outlinks = {}     # path -> [target, ...] (去重，保持出现顺序)
+        # 页面数据按列存储 (SoA)：page_index 给出行号，各列为紧凑的 0/1 字节数组
+        self.page_index = {}   # path -> idx
+        self.has_h1 = bytearray()
+        self.has_schema = bytearray()
         self.external_links = set()
         self.issues = []
         self.score = 100
+        # 路径解析缓存：导航栏 / 页脚链接在每个页面都会重复出现
+        self._resolve_cached = lru_cache(maxsize=65536)(self._resolve_search_path)
+        # 站内 URL 路径换算：根目录前缀只算一次，同一目标文件的结果同样缓存
+        self._root_prefix = os.path.join(str(self.root_dir), '')
+        self._rel_url_cached = lru_cache(maxsize=65536)(self._to_rel_url)
+        self._stat_cache = {}  # 候选路径 -> Path (普通文件) / None (不存在或不是文件)
+        self._href_to_file = {}  # 规范化搜索路径 -> 已扫描的 HTML 文件
+        # 跨运行的解析结果缓存：(路径, mtime, size, validate_schema) -> ParsedPage，未修改的文件不再重新解析
+        self.parse_cache_path = self.root_dir / '.audit_cache.json'
+        self._parse_cache = {}
 
         # --- 配置：白名单与忽略项 ---
         self.ignore_url_patterns = [
@@ -35,6 +103,9 @@ class SiteAuditor:
             'google',         # 忽略 Google 验证文件 (文件名包含 google)
             '404.html'        # 忽略 404 页面 (本身就是孤岛)
         ]
+        # 预编译为单个正则，每个 href / 文件名只需一次 C 层扫描 (空列表时使用永不匹配的模式)
+        self._ignore_url_re = re.compile('|'.join(map(re.escape, self.ignore_url_patterns)) or r'(?!)')
+        self._ignore_file_re = re.compile('|'.join(map(re.escape, self.ignore_file_patterns)) or r'(?!)')
 
     def log(self, msg, level="INFO"):
         color = Fore.CYAN
@@ -52,20 +123,27 @@ class SiteAuditor:
             return
 
         try:
-            with open(index_path, 'r', encoding='utf-8', errors='ignore') as f:
-                soup = BeautifulSoup(f, 'html.parser')
-                
-                # Canonical
-                canonical = soup.find('link', rel='canonical')
-                if canonical and canonical.get('href'):
-                    self.base_url = canonical['href']
-                    self.log(f"Detected Base URL: {self.base_url}", "SUCCESS")
-                
-                # Keywords
-                meta_kw = soup.find('meta', attrs={'name': 'keywords'})
-                if meta_kw:
-                    self.keywords = [k.strip() for k in meta_kw.get('content', '').split(',')]
-                    self.log(f"Keywords: {', '.join(self.keywords)}", "INFO")
+            # canonical / keywords 都在 <head> 里：lxml 流式读取，</head> 结束即停止，不解析正文
+            # 自己打开文件：提前 break 时 with 负责关闭句柄 (iterparse 自行打开的文件不会被关闭)
+            canonical = meta_kw = None
+            with open(index_path, 'rb') as f:
+                for _, el in etree.iterparse(f, events=('end',), tag=('head', 'link', 'meta'), html=True, encoding='utf-8'):
+                    if el.tag == 'head':
+                        break
+                    if canonical is None and el.tag == 'link' and 'canonical' in el.get('rel', '').split():
+                        canonical = el
+                    elif meta_kw is None and el.tag == 'meta' and el.get('name') == 'keywords':
+                        meta_kw = el
+
+            # Canonical
+            if canonical is not None and canonical.get('href'):
+                self.base_url = canonical.get('href')
+                self.log(f"Detected Base URL: {self.base_url}", "SUCCESS")
+            
+            # Keywords
+            if meta_kw is not None:
+                self.keywords = [k.strip() for k in meta_kw.get('content', '').split(',')]
+                self.log(f"Keywords: {', '.join(self.keywords)}", "INFO")
         except Exception as e:
             self.log(f"Config Error: {e}", "ERROR")
 
@@ -77,6 +155,13 @@ class SiteAuditor:
         # 移除 query参数 和 锚点
         clean_href = href.split('?')[0].split('#')[0]
         
+        # 0. 最常见的情况：根路径链接指向已扫描的页面 (/blog/post, /blog/)。
+        #    纯字符串拼接后直接查表，不构造任何 Path 对象
+        if clean_href.startswith('/'):
+            target = self._href_to_file.get(os.path.normpath(self._root_prefix + clean_href.lstrip('/')))
+            if target is not None:
+                return target
+
         # 1. 确定搜索的基础路径
         if clean_href.startswith('/'):
             # 根路径：基于 self.root_dir
@@ -85,7 +170,17 @@ class SiteAuditor:
             # 相对路径：基于当前文件所在目录
             search_path = current_file_path.parent / clean_href
 
-        # 2. 尝试匹配文件
+            # 2. 相对链接同样先规范化后查表，零系统调用
+            target = self._href_to_file.get(os.path.normpath(search_path))
+            if target is not None:
+                return target
+
+        # 3. 尝试匹配文件 (同一目标会被多个页面反复引用，结果按路径缓存)
+        return self._resolve_cached(str(search_path))
+
+    def _resolve_search_path(self, search_path_str):
+        """按 原样 / 加 .html / 文件夹 index.html 的顺序查找真实文件，找不到返回 None"""
+        search_path = Path(search_path_str)
         candidates = [
             search_path,                              # 原样 (e.g. /image.png)
             search_path.with_suffix('.html'),         # 加 .html (Clean URL)
@@ -94,16 +189,47 @@ class SiteAuditor:
 
         # 如果 search_path 已经是 .html 结尾，candidates[1] 会重复，但这无所谓
         for candidate in candidates:
-            # resolve() 处理 ../ 等相对符号，但为了防止跳出根目录报错，加 try
-            try:
-                candidate_resolved = candidate.resolve()
-                if candidate_resolved.exists() and candidate_resolved.is_file():
-                    return candidate_resolved
-            except (FileNotFoundError, RuntimeError):
-                continue
+            # normpath 处理 ../ 等相对符号 (纯字符串运算)；每个候选路径最多 stat 一次
+            candidate_str = os.path.normpath(candidate)
+            if candidate_str in self._stat_cache:
+                target = self._stat_cache[candidate_str]
+            else:
+                try:
+                    target = Path(candidate_str) if stat.S_ISREG(os.stat(candidate_str).st_mode) else None
+                except (OSError, ValueError):
+                    target = None
+                self._stat_cache[candidate_str] = target
+            if target is not None:
+                return target
         
         return None
 
+    def _build_href_index(self):
+        """
+        为已扫描页面建立 搜索路径 -> 文件 的索引，覆盖三种写法：
+        /blog/post.html (原样)、/blog/post (Clean URL)、/blog/ (文件夹 index.html)。
+        按 resolve 的候选顺序插入，保证优先级一致。
+        """
+        self._href_to_file = {str(f): f for f in self.html_files}
+        for f in self.html_files:
+            self._href_to_file.setdefault(str(f.with_suffix('')), f)
+        for f in self.html_files:
+            if f.name == 'index.html':
+                self._href_to_file.setdefault(str(f.parent), f)
+
+    def _to_rel_url(self, path):
+        """
+        本地绝对路径 -> 站内 URL 路径 (e.g. /blog/a.html)，用字符串切片代替 relative_to。
+        站点根目录之外的文件 (如 /../outside.html) 不属于本站，返回 None，按死链处理。
+        """
+        path_str = str(path)
+        if not path_str.startswith(self._root_prefix):
+            return None
+        rel = path_str[len(self._root_prefix):]
+        if os.sep != '/':
+            rel = rel.replace(os.sep, '/')
+        return '/' + rel
+
     def scan_files(self):
         all_files = self.root_dir.rglob('*.html')
         # 过滤掉 .git, node_modules 以及 ignore_file_patterns 中的文件
@@ -111,103 +237,217 @@ class SiteAuditor:
         for f in all_files:
             if '.git' in f.parts or 'node_modules' in f.parts:
                 continue
-            if any(ign in f.name for ign in self.ignore_file_patterns):
+            if self._ignore_file_re.search(f.name):
                 continue
             self.html_files.append(f)
         
         self.log(f"Scanning {len(self.html_files)} HTML files...", "INFO")
+        self._resolve_cached.cache_clear()
+        self._rel_url_cached.cache_clear()
+        # 扫描到的页面必然存在，预先填入，指向它们的链接无需任何系统调用
+        self._stat_cache = {str(f): f for f in self.html_files}
+        self._build_href_index()
         
-        for file_path in self.html_files:
+        self._load_parse_cache()
+        cache_keys = [self._parse_cache_key(f) for f in self.html_files]
+        next_cache = {}
+
+        # 第一遍：各文件解析互不依赖，并行执行；解析阶段只读不写，无需加锁
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(self._parse_file, self.html_files, cache_keys)
+
+        # 第二遍：主线程检查链接并合并结果。链接按 (所在目录, href) 去重，
+        # 导航栏 / 页脚这类每页重复的链接只解析一次，其余页面直接复用结果
+        resolved = {}
+        for file_path, cache_key, (rel_path, page, issues) in zip(self.html_files, cache_keys, results):
+            # 初始化入度计数 (显式写入 0，孤岛检测依赖这个键存在)
+            self.links_graph.setdefault(rel_path, 0)
+            if page is None:
+                continue
+            if cache_key is not None:
+                next_cache[cache_key] = page
+
+            # 页面自身的数据先登记，链接检查出错时只丢失链接数据
+            self.page_index[rel_path] = len(self.page_index)
+            self.has_h1.append(page.h1_count > 0)
+            self.has_schema.append(page.has_schema)
+            self.issues.extend(issues)
+
             try:
-                rel_path = "/" + str(file_path.relative_to(self.root_dir)).replace(os.sep, '/')
-                
-                # 初始化入度计数
-                if rel_path not in self.links_graph:
-                    self.links_graph[rel_path] = 0
-
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    soup = BeautifulSoup(f, 'html.parser')
-                    
-                    # --- SEO 检查 ---
-                    h1_tags = soup.find_all('h1')
-                    schema = soup.find('script', type='application/ld+json')
-                    nav_bread = soup.find(attrs={'aria-label': 'breadcrumb'}) or soup.find(class_=re.compile('breadcrumb', re.I))
-                    
-                    self.pages_data[rel_path] = {'has_h1': bool(h1_tags), 'has_schema': bool(schema)}
-
-                    if len(h1_tags) == 0:
-                        self.issues.append({'type': 'Semantic', 'msg': f"Missing H1: {rel_path}", 'deduct': 5})
-                    elif len(h1_tags) > 1:
-                        self.issues.append({'type': 'Semantic', 'msg': f"Multiple H1s: {rel_path}", 'deduct': 2}) # 降权扣分
-                    if not schema:
-                         self.issues.append({'type': 'Schema', 'msg': f"Missing Schema: {rel_path}", 'deduct': 2}) # 降权扣分
-
-                    # --- 链接提取与检查 ---
-                    for a in soup.find_all('a', href=True):
-                        href = unquote(a['href'].strip())
-                        
-                        # A. 检查忽略名单
-                        if any(pattern in href for pattern in self.ignore_url_patterns):
-                            continue
-
-                        # B. 外部链接
-                        if href.startswith(('http://', 'https://')):
-                            if self.base_url and href.startswith(self.base_url):
-                                # 包含了本站域名，视为内部链接处理，但也给个警告
-                                self.issues.append({'type': 'URL_Strategy', 'msg': f"Absolute internal URL: {rel_path} -> {href}", 'deduct': 1})
-                                # 尝试转为相对路径继续检查（去掉域名部分）
-                                href = href.replace(self.base_url, '/')
-                            else:
-                                self.external_links.add(href)
-                                continue
-
-                        # C. URL 规范性检查 (Warnings)
-                        if not href.startswith('/'):
-                             # 只是警告，不再导致死链误判，因为下面 resolve_file_path 会处理它
-                             self.issues.append({'type': 'URL_Strategy', 'msg': f"Relative path usage: {rel_path} -> {href}", 'deduct': 2})
-                        
-                        if href.endswith('.html') or 'index.html' in href:
-                             self.issues.append({'type': 'Clean_URL', 'msg': f"Dirty URL (.html): {rel_path} -> {href}", 'deduct': 2})
-
-                        # D. 内部死链验证 (关键修复)
-                        target_file = self.resolve_file_path(file_path, href)
-                        
-                        if target_file:
-                            # 链接有效，记录权重传递
-                            target_rel = "/" + str(target_file.relative_to(self.root_dir)).replace(os.sep, '/')
-                            self.links_graph[target_rel] = self.links_graph.get(target_rel, 0) + 1
-                        else:
-                            # 真的找不到文件
-                            self.issues.append({'type': 'Broken_Link', 'msg': f"Dead Link: {rel_path} -> {href}", 'deduct': 10})
+                link_issues, local_links, external_links = self._check_links(file_path, rel_path, page.hrefs, resolved)
+            except Exception as e:
+                self.log(f"Error parsing {file_path}: {e}", "ERROR")
+                continue
+
+            self.issues.extend(link_issues)
+            self.links_graph.update(local_links)
+            self.outlinks[rel_path] = list(dict.fromkeys(local_links))
+            self.external_links.update(external_links)
+
+        # 只保留本次仍存在的文件，顺带清掉已删除页面的旧条目
+        if next_cache != self._parse_cache:
+            self._save_parse_cache(next_cache)
+
+    def _parse_cache_key(self, file_path):
+        try:
+            st = file_path.stat()
+        except OSError:
+            return None
+        return f"{file_path}|{st.st_mtime_ns}|{st.st_size}|{self.validate_schema}"
 
+    def _load_parse_cache(self):
+        try:
+            # 缓存文件位于被审计的站点目录中，不可信：只用 JSON (纯数据) 存储，不用 pickle
+            with open(self.parse_cache_path, 'r', encoding='utf-8') as f:
+                self._parse_cache = {k: ParsedPage(*v) for k, v in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            self._parse_cache = {}
+
+    def _save_parse_cache(self, cache):
+        # 先写临时文件再原子替换，中断时不会留下损坏的缓存
+        tmp_path = self.parse_cache_path.with_name(self.parse_cache_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.parse_cache_path)
+            self._parse_cache = cache
+        except OSError as e:
+            self.log(f"Cache write failed: {e}", "WARN")
+
+    def _parse_file(self, file_path, cache_key=None):
+        """
+        解析单个 HTML 文件 (命中缓存时直接复用上次结果) 并完成 SEO 检查。
+        只读取配置和缓存，不修改实例状态，可安全地在线程池中并发调用。
+        返回 (rel_path, page, issues)，page 为 ParsedPage，解析失败时为 None。
+        """
+        rel_path = self._to_rel_url(file_path)
+        issues = []
+        page = self._parse_cache.get(cache_key)
+        if page is None:
+            try:
+                # 单次流式遍历：解析器直接回调收集器，一次性收集 H1 / Schema / 面包屑 / 链接，不构建任何树
+                collector = etree.parse(str(file_path), etree.HTMLParser(target=_PageCollector(self.validate_schema), encoding='utf-8'))
             except Exception as e:
                 self.log(f"Error parsing {file_path}: {e}", "ERROR")
+                return rel_path, None, []
+            page = ParsedPage(collector.h1_count, collector.has_schema, collector.has_bread, collector.hrefs, collector.schema_texts)
+
+        # --- SEO 检查 ---
+        if page.h1_count == 0:
+            issues.append(Issue('Semantic', f"Missing H1: {rel_path}", 5))
+        elif page.h1_count > 1:
+            issues.append(Issue('Semantic', f"Multiple H1s: {rel_path}", 2)) # 降权扣分
+        if not page.has_schema:
+             issues.append(Issue('Schema', f"Missing Schema: {rel_path}", 2)) # 降权扣分
+        for schema_text in page.schema_texts:
+            try:
+                fast_json.loads(schema_text)
+            except ValueError:
+                issues.append(Issue('Schema', f"Malformed ld+json: {rel_path}", 3))
+                break
+
+        return rel_path, page, issues
+
+    def _check_links(self, file_path, rel_path, hrefs, resolved):
+        """
+        检查单个页面的链接。resolved 为跨页面共享的解析结果缓存：
+        (所在目录, href) 或 根路径 href -> 目标站内路径 / None (死链)。
+        返回 (issues, local_links, external_links)。
+        """
+        issues = []
+        local_links = []
+        external_links = set()
+
+        # --- 链接提取与检查 ---
+        for raw_href in hrefs:
+            href = unquote(raw_href.strip())
+            
+            # A. 检查忽略名单
+            if self._ignore_url_re.search(href):
+                continue
+
+            # B. 外部链接
+            if href.startswith(('http://', 'https://')):
+                if self.base_url and href.startswith(self.base_url):
+                    # 包含了本站域名，视为内部链接处理，但也给个警告
+                    issues.append(Issue('URL_Strategy', f"Absolute internal URL: {rel_path} -> {href}", 1))
+                    # 尝试转为相对路径继续检查（去掉域名部分）
+                    href = href.replace(self.base_url, '/')
+                else:
+                    external_links.add(href)
+                    continue
+
+            # C. URL 规范性检查 (Warnings)
+            if not href.startswith('/'):
+                 # 只是警告，不再导致死链误判，因为下面 resolve_file_path 会处理它
+                 issues.append(Issue('URL_Strategy', f"Relative path usage: {rel_path} -> {href}", 2))
+            
+            if href.endswith('.html') or 'index.html' in href:
+                 issues.append(Issue('Clean_URL', f"Dirty URL (.html): {rel_path} -> {href}", 2))
+
+            # D. 内部死链验证 (关键修复)：根路径与所在目录无关，只按 href 去重
+            key = href if href.startswith('/') else (file_path.parent, href)
+            if key in resolved:
+                target_rel = resolved[key]
+            else:
+                target_file = self.resolve_file_path(file_path, href)
+                target_rel = self._rel_url_cached(target_file) if target_file else None
+                resolved[key] = target_rel
+            
+            if target_rel:
+                # 链接有效，记录权重传递
+                local_links.append(target_rel)
+            else:
+                # 真的找不到文件
+                issues.append(Issue('Broken_Link', f"Dead Link: {rel_path} -> {href}", 10))
+
+        return issues, local_links, external_links
 
     def check_external_links(self):
         if not self.external_links: return
         self.log(f"Checking {len(self.external_links)} external links (Async)...", "INFO")
         
+        # 共享 Session：同一主机的链接复用连接池，省去重复的 TCP / TLS 握手
+        session = requests.Session()
+        session.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; SeoAuditor/2.0)'})
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        # 连接失败的主机直接记下，同主机的其余链接不再发起 DNS 解析和连接
+        dead_hosts = set()
+
         def check_url(url):
             try:
-                headers = {'User-Agent': 'Mozilla/5.0 (compatible; SeoAuditor/2.0)'}
-                r = requests.head(url, timeout=5, allow_redirects=True, headers=headers)
+                host = urlsplit(url).netloc
+                if host in dead_hosts:
+                    return (url, "Connect Error")
+                r = session.head(url, timeout=5, allow_redirects=True)
                 if r.status_code >= 400:
                     # 有些服务器不支持 HEAD，重试一次 GET
                     if r.status_code == 405 or r.status_code == 403:
-                         r = requests.get(url, timeout=5, headers=headers, stream=True)
-                         if r.status_code >= 400: return (url, r.status_code)
+                         with session.get(url, timeout=5, stream=True) as r:
+                             if r.status_code >= 400: return (url, r.status_code)
                     else:
                         return (url, r.status_code)
-            except:
+            except requests.exceptions.ConnectionError as e:
+                # 跟随重定向时失败的可能是跳转后的主机
+                dead_hosts.add(urlsplit(e.request.url).netloc if e.request is not None else host)
                 return (url, "Connect Error")
+            except requests.exceptions.Timeout:
+                return (url, "Timeout")
+            except (requests.exceptions.RequestException, ValueError):
+                # 其余请求异常及非法 URL
+                return (url, "Request Error")
             return None
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            results = executor.map(check_url, self.external_links)
+        # 纯 IO 等待，线程几乎不占 CPU：并发数随链接数放大 (上限 50)，不再被固定的 10 个线程卡住
+        with session, ThreadPoolExecutor(max_workers=min(50, len(self.external_links))) as executor:
+            results = list(executor.map(check_url, self.external_links))
         
         for res in results:
             if res:
-                self.issues.append({'type': 'External_Dead', 'msg': f"External 404: {res[0]} ({res[1]})", 'deduct': 5})
+                self.issues.append(Issue('External_Dead', f"External 404: {res[0]} ({res[1]})", 5))
 
     def analyze_structure(self):
         # 检查孤岛 (只检查我们实际扫描到的文件)
@@ -219,41 +459,71 @@ class SiteAuditor:
             # 这里简化逻辑：只要 links_graph 里计数为 0 且它是被扫描到的页面
             if self.links_graph[page_rel] == 0:
                  # 再次确认不是忽略文件
-                 if not any(ign in page_rel for ign in self.ignore_file_patterns):
-                    self.issues.append({'type': 'Orphan', 'msg': f"Orphan Page (0 Inbound): {page_rel}", 'deduct': 5})
-        
+                 if not self._ignore_file_re.search(page_rel):
+                    self.issues.append(Issue('Orphan', f"Orphan Page (0 Inbound): {page_rel}", 5))
+
+    def compute_pagerank(self, damping=0.85, iterations=30):
+        """
+        在已扫描页面之间做 PageRank 幂迭代 (稀疏邻接表，每轮只遍历一次边)。
+        没有出链的页面把权重均分给全站。返回 path -> rank。
+        """
+        pages = list(self.page_index)
+        n = len(pages)
+        if n == 0:
+            return {}
+        node_id = {page: i for i, page in enumerate(pages)}
+        out_edges = [[node_id[t] for t in self.outlinks.get(page, ()) if t in node_id] for page in pages]
+
+        rank = [1.0 / n] * n
+        for _ in range(iterations):
+            dangling = sum(rank[i] for i, edges in enumerate(out_edges) if not edges)
+            new_rank = [(1 - damping) / n + damping * dangling / n] * n
+            for i, edges in enumerate(out_edges):
+                if edges:
+                    share = damping * rank[i] / len(edges)
+                    for j in edges:
+                        new_rank[j] += share
+            rank = new_rank
+        return dict(zip(pages, rank))
+
     def print_report(self):
         print("\n" + "="*40)
         print(f" AUDIT REPORT (Optimized) ")
         print("="*40)
 
-        deductions = {}
-        
-        for issue in self.issues:
-            # 聚合相同类型的扣分，防止分数溢出
-            self.score -= issue['deduct']
+        # 完全相同的问题 (同类型 + 同消息) 合并为一行输出，扣分按次数累计
+        for issue, count in Counter(self.issues).items():
+            self.score -= issue.deduct * count
             level = "ERROR"
-            if issue['deduct'] <= 2: level = "WARN"
-            if issue['type'] in ['Semantic', 'Schema']: level = "SEO"
+            if issue.deduct <= 2: level = "WARN"
+            if issue.type in ['Semantic', 'Schema']: level = "SEO"
             
-            self.log(f"[{issue['type']}] {issue['msg']}", level)
+            suffix = f" (x{count})" if count > 1 else ""
+            self.log(f"[{issue.type}] {issue.msg}{suffix}", level)
 
         self.score = max(0, self.score)
 
+        # 全站覆盖率：在字节数组上直接计数 (C 层扫描)
+        total = len(self.page_index)
+        if total:
+            print("-" * 40)
+            print(f"H1 coverage: {self.has_h1.count(1)}/{total}  |  Schema coverage: {self.has_schema.count(1)}/{total}")
+
         print("-" * 40)
-        print(Fore.MAGENTA + "Top Pages by Inbound Links:")
-        # 过滤掉不存在于 pages_data 的键（防止引用了非HTML资源干扰列表）
-        valid_ranks = {k:v for k,v in self.links_graph.items() if k in self.pages_data or k == '/index.html'}
-        sorted_pages = sorted(valid_ranks.items(), key=lambda item: item[1], reverse=True)[:10]
-        for page, count in sorted_pages:
-            print(f"  {count} links -> {page}")
+        print(Fore.MAGENTA + "Top Pages by PageRank:")
+        # PageRank 只在已扫描页面间计算，非 HTML 资源天然不参与排名
+        # 只取 Top 10：heapq.nlargest 为 O(N log 10)，无需对全部页面排序
+        ranks = self.compute_pagerank()
+        sorted_pages = heapq.nlargest(10, ranks.items(), key=itemgetter(1))
+        for page, rank in sorted_pages:
+            print(f"  {rank:.4f} ({self.links_graph[page]} links) -> {page}")
 
         print("-" * 40)
         color = Fore.GREEN if self.score > 80 else (Fore.YELLOW if self.score > 50 else Fore.RED)
         print(f"{Style.BRIGHT}FINAL SEO SCORE: {color}{self.score}/100{Style.RESET_ALL}")
 
 if __name__ == "__main__":
-    auditor = SiteAuditor()
+    auditor = SiteAuditor(validate_schema='--validate-schema' in sys.argv)
     auditor.auto_config()
     auditor.scan_files()
     auditor.check_external_links() 
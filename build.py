@@ -1,10 +1,16 @@
 import os
 import re
+import shutil
+import copy
 import json
 import datetime
+import hashlib
+import zlib
+import xml.etree.ElementTree as ET
+from collections import defaultdict
 from pathlib import Path
-from bs4 import BeautifulSoup
-from difflib import SequenceMatcher
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from concurrent.futures import ProcessPoolExecutor
 
 # ================= 配置区域 =================
 BASE_URL = "https://mjmai.top"
@@ -12,14 +18,95 @@ SOURCE_FILE = "index.html"
 BLOG_DIR = "blog"
 IGNORE_DIRS = ['.git', 'node_modules', '__pycache__']
 AUTHOR_NAME = "MjMai"
+BUILD_CACHE_FILE = ".build_cache.json"  # 增量构建记录 (page -> [src_mtime_ns, template_hash])
+PARALLEL_MIN_PAGES = 8  # 少于这个数量的页面直接串行处理，进程池启动比解析几个页面更贵
+CARD_ICONS = ("💎", "🚀", "⚖️", "🎨", "📝", "🔥")
+CARD_COLORS = ("violet", "fuchsia", "blue", "emerald", "amber", "indigo")
 # ===========================================
 
+def _atomic_write_if_changed(path, new_bytes):
+    """Replace `path` with `new_bytes` unless it already holds exactly that; returns whether it wrote"""
+    exists = True
+    try:
+        if path.read_bytes() == new_bytes:
+            return False
+    except FileNotFoundError:
+        exists = False
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    try:
+        tmp.write_bytes(new_bytes)
+        # Keep the page's permissions: the temp file was created with the umask defaults
+        if exists:
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        # Don't leave a partial .tmp next to the page
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+# 首页/聚合页中放文章卡片的 grid 容器
+_GRID_RE = re.compile(r'grid')
+_GRID_INDEX_RE = re.compile(r'grid-cols-1.*lg:grid-cols-3')
+
+# 首页/聚合页的文章卡片 (占位符: color, icon, date, url, h1, desc)
+_CARD_TMPL = '''
+        <article class="glass-card rounded-2xl overflow-hidden group hover:border-{color}-500/50 transition-all duration-300">
+            <div class="h-48 bg-gradient-to-br from-{color}-900/50 to-slate-900 flex items-center justify-center relative overflow-hidden">
+                <div class="absolute inset-0 bg-[url('data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAiIGhlaWdodD0iMjAiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+PGNpcmNsZSBjeD0iMSIgY3k9IjEiIHI9IjEiIGZpbGw9InJnYmEoMjU1LDI1NSwyNTUsMC4xKSIvPjwvc3ZnPg==')] opacity-30"></div>
+                <div class="w-16 h-16 bg-{color}-600/20 rounded-2xl flex items-center justify-center text-{color}-400 text-3xl group-hover:scale-110 transition-transform duration-300">
+                    {icon}
+                </div>
+            </div>
+            <div class="p-6">
+                <div class="flex items-center gap-2 mb-4 text-xs font-bold uppercase tracking-wider text-{color}-400">
+                    <span>Article</span>
+                    <span class="w-1 h-1 rounded-full bg-slate-600"></span>
+                    <span>{date}</span>
+                </div>
+                <h3 class="text-xl font-bold text-white mb-3 group-hover:text-{color}-300 transition-colors">
+                    <a href="{url}">{h1}</a>
+                </h3>
+                <p class="text-slate-400 text-sm mb-6 line-clamp-2">
+                    {desc}
+                </p>
+                <a href="{url}" class="inline-flex items-center text-sm font-bold text-white hover:text-{color}-400 transition-colors">
+                    阅读全文
+                    <svg class="w-4 h-4 ml-1 transition-transform group-hover:translate-x-1" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M17 8l4 4m0 0l-4 4m4-4H3"></path></svg>
+                </a>
+            </div>
+        </article>
+        '''
+
+# 子进程内的 builder (由 _init_worker 设置)
+_worker_builder = None
+
+def _init_worker(root_dir, header_str, footer_str):
+    """Process pool initializer: rebuild a builder from the pickled layout fragments"""
+    global _worker_builder
+    _worker_builder = StaticSiteBuilder(root_dir)
+    if header_str:
+        _worker_builder.header_html = BeautifulSoup(header_str, 'lxml').find(['header', 'nav'])
+    if footer_str:
+        _worker_builder.footer_html = BeautifulSoup(footer_str, 'lxml').find('footer')
+
+def _process_one(page, recs):
+    """Worker entry point for process_pages"""
+    return _worker_builder._render_page(page, recs)
+
 class StaticSiteBuilder:
     def __init__(self, root_dir='.'):
         self.root_dir = Path(root_dir).resolve()
         self.header_html = None
         self.footer_html = None
+        self._index_soup = None  # index.html, parsed once and shared with update_home_page
         self.pages = [] 
+        # Related-posts index, rebuilt by scan_content (see _build_related_index)
+        self._articles = []
+        self._article_pos = {}
+        self._kwsets = []
+        self._kw_index = {}
+        self._bigram_index = {}
 
     def log(self, msg):
         print(f"🔧 {msg}")
@@ -30,22 +117,27 @@ class StaticSiteBuilder:
         if not source_path.exists():
             raise FileNotFoundError(f"Source file {SOURCE_FILE} not found!")
 
-        with open(source_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-            
-            # Find header (try explicit ID first, then tag)
-            header = soup.find('header', id='navbar') or soup.find('header') or soup.find('nav')
-            footer = soup.find('footer')
-
-            if header:
-                self._normalize_links(header)
-                self.header_html = header
-                self.log("已提取并标准化 Header")
-            
-            if footer:
-                self._normalize_links(footer)
-                self.footer_html = footer
-                self.log("已提取并标准化 Footer")
+        with open(source_path, 'rb') as f:
+            # Full parse: update_home_page reuses this tree instead of parsing index.html again
+            soup = BeautifulSoup(f, 'lxml', from_encoding='utf-8')
+        self._index_soup = soup
+            
+        # Find header (try explicit ID first, then tag)
+        header = soup.find('header', id='navbar') or soup.find('header') or soup.find('nav')
+        footer = soup.find('footer')
+
+        # Normalize copies so index.html itself keeps its original links
+        if header:
+            header = copy.copy(header)
+            self._normalize_links(header)
+            self.header_html = header
+            self.log("已提取并标准化 Header")
+        
+        if footer:
+            footer = copy.copy(footer)
+            self._normalize_links(footer)
+            self.footer_html = footer
+            self.log("已提取并标准化 Footer")
 
     def _normalize_links(self, soup_element):
         """Convert all links to root-relative paths"""
@@ -73,31 +165,58 @@ class StaticSiteBuilder:
         """Scan both blog directory and root directory for HTML files"""
         self.pages = [] # Reset
         
+        tasks = []
+        
         # 1. Scan Blog Articles (Type A)
         blog_path = self.root_dir / BLOG_DIR
         if blog_path.exists():
-            for file_path in blog_path.glob('*.html'):
+            for file_path in self._list_html(blog_path):
                 if file_path.name == 'index.html': continue
-                self._parse_and_add_page(file_path, page_type='article')
+                tasks.append((file_path, 'article'))
 
         # 2. Scan Root Pages (Type B)
-        for file_path in self.root_dir.glob('*.html'):
+        for file_path in self._list_html(self.root_dir):
             if file_path.name == SOURCE_FILE: continue # Skip index.html
             if file_path.name.startswith('google'): continue # Skip google verification files
-            self._parse_and_add_page(file_path, page_type='page')
+            tasks.append((file_path, 'page'))
+
+        # Metadata parsing is CPU-bound and independent per file, so fan it out across processes
+        paths, types = zip(*tasks) if tasks else ((), ())
+        if len(tasks) >= PARALLEL_MIN_PAGES:
+            with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(tasks))) as executor:
+                self.pages = list(executor.map(self._parse_page, paths, types, chunksize=8))
+        else:
+            self.pages = list(map(self._parse_page, paths, types))
 
         # Sort by date descending (mainly for articles, but keeps list consistent)
         self.pages.sort(key=lambda x: x['date'], reverse=True)
+        self._build_related_index()
         self.log(f"已扫描 {len(self.pages)} 个页面 (含文章与单页)")
 
-    def _parse_and_add_page(self, file_path, page_type):
-        """Helper to parse a file and add to pages list"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
+    @staticmethod
+    def _list_html(directory):
+        """Yield the .html files directly inside `directory` (name filter before any stat)"""
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith('.html') and entry.is_file():
+                    yield Path(entry.path)
+
+    @staticmethod
+    def _parse_page(file_path, page_type):
+        """Parse a file's metadata into a page dict (static so it pickles for worker processes)"""
+        with open(file_path, 'rb') as f:
+            # Metadata only: keep just the tags read below (a matched tag keeps its whole subtree)
+            soup = BeautifulSoup(f, 'lxml', from_encoding='utf-8', parse_only=SoupStrainer(['title', 'meta', 'h1', 'time']))
             
             # Title
             title = soup.title.string.strip() if soup.title else file_path.stem
             
+            # Character bigrams for the related-posts title fallback (works for CJK titles without tokenizing)
+            title_bigrams = frozenset(title[i:i + 2] for i in range(max(len(title) - 1, 1)))
+            
+            # Card icon/color: crc32 is stable across runs, unlike the salted str hash()
+            h = zlib.crc32(title.encode('utf-8'))
+            
             # Description
             desc_tag = soup.find('meta', attrs={'name': 'description'})
             desc = desc_tag['content'].strip() if desc_tag else ""
@@ -110,9 +229,9 @@ class StaticSiteBuilder:
             h1_tag = soup.find('h1')
             h1 = h1_tag.get_text().strip() if h1_tag else title
 
-            # Date
-            mtime = datetime.datetime.fromtimestamp(file_path.stat().st_mtime)
-            date_obj = mtime
+            # Date (one stat per page; process_pages reuses mtime_ns for the incremental check)
+            st = file_path.stat()
+            date_obj = datetime.datetime.fromtimestamp(st.st_mtime)
             
             time_tag = soup.find('time')
             if time_tag and time_tag.has_attr('datetime'):
@@ -136,7 +255,7 @@ class StaticSiteBuilder:
             else:
                 rel_url = f"/{file_path.stem}"
             
-            self.pages.append({
+            return {
                 'path': file_path,
                 'url': rel_url,
                 'title': title,
@@ -145,63 +264,112 @@ class StaticSiteBuilder:
                 'keywords': keywords,
                 'date': date_obj,
                 'date_iso': date_iso,
-                'type': page_type # 'article' or 'page'
-            })
+                'mtime_ns': st.st_mtime_ns,
+                'title_bigrams': title_bigrams,
+                'type': page_type, # 'article' or 'page'
+                'icon': CARD_ICONS[h % len(CARD_ICONS)],
+                'color': CARD_COLORS[h % len(CARD_COLORS)]
+            }
+
+    @staticmethod
+    def _keyword_set(page):
+        return frozenset(k.strip().lower() for k in page['keywords'].split(',') if k.strip())
+
+    def _build_related_index(self):
+        """Split every article's keywords once and index them (keyword/title bigram -> article positions)"""
+        self._articles = [p for p in self.pages if p['type'] == 'article']
+        self._article_pos = {p['path']: i for i, p in enumerate(self._articles)}
+        self._kwsets = [self._keyword_set(p) for p in self._articles]
+        self._kw_index = defaultdict(set)
+        self._bigram_index = defaultdict(set)
+        for i, (kws, p) in enumerate(zip(self._kwsets, self._articles)):
+            for kw in kws:
+                self._kw_index[kw].add(i)
+            for bg in p['title_bigrams']:
+                self._bigram_index[bg].add(i)
+
+    @staticmethod
+    def _overlap(index, tokens):
+        """Count shared tokens per article, touching only articles that share at least one"""
+        counts = defaultdict(int)
+        for t in tokens:
+            for i in index.get(t, ()):
+                counts[i] += 1
+        return counts
 
     def get_related_posts(self, current_page, limit=2):
         """Get related posts based on keyword matching (Only from Articles)"""
         if current_page['type'] != 'article': return []
 
-        scores = []
-        current_keywords = set(k.strip().lower() for k in current_page['keywords'].split(',') if k.strip())
-        
         # Only recommend other ARTICLES
-        articles = [p for p in self.pages if p['type'] == 'article']
+        articles = self._articles
+        me = self._article_pos.get(current_page['path'])
+        current_keywords = self._kwsets[me] if me is not None else self._keyword_set(current_page)
         
-        for other in articles:
-            if other['path'] == current_page['path']: continue
-            
-            other_keywords = set(k.strip().lower() for k in other['keywords'].split(',') if k.strip())
-            
-            # Intersection count
-            score = len(current_keywords.intersection(other_keywords))
-            
-            # Fallback to title similarity if no keyword overlap
-            if score == 0:
-                score = SequenceMatcher(None, current_page['title'], other['title']).ratio() * 0.5 
-            
-            scores.append((score, other))
-            
-        scores.sort(key=lambda x: x[0], reverse=True)
-        return [item[1] for item in scores[:limit] if item[0] > 0]
-
-    def generate_breadcrumb_html(self, title, page_type):
-        """Generate semantic breadcrumbs based on page type"""
+        # Intersection count, only for articles sharing at least one keyword
+        overlap = self._overlap(self._kw_index, current_keywords)
+        overlap.pop(me, None)
+        ranked = sorted(overlap, key=lambda i: (-overlap[i], i))
+        
+        # Fallback to title similarity: bigram Jaccard, worth at most 0.5 so always below any keyword match
+        if len(ranked) < limit:
+            mine = current_page.get('title_bigrams', ())
+            shared = self._overlap(self._bigram_index, mine)
+            rest = []
+            for i, inter in shared.items():
+                if i == me or i in overlap: continue
+                score = inter / (len(mine) + len(articles[i]['title_bigrams']) - inter) * 0.5
+                rest.append((-score, i))
+            rest.sort()
+            ranked.extend(i for _, i in rest)
+        
+        return [articles[i] for i in ranked[:limit]]
+
+    @staticmethod
+    def _new_tag(soup, name, attrs, text=None):
+        """Create a tag (optionally with text) without going through the HTML parser"""
+        tag = soup.new_tag(name, attrs=attrs)
+        if text is not None:
+            tag.string = text
+        return tag
+
+    def generate_breadcrumb(self, soup, title, page_type):
+        """Build semantic breadcrumbs based on page type as nodes of `soup`"""
+        link_cls = "hover:text-blue-600 transition-colors"
+        nav = self._new_tag(soup, 'nav', {'aria-label': 'Breadcrumb', 'class': 'text-sm text-slate-400 mb-6'})
+        ol = self._new_tag(soup, 'ol', {'class': 'flex flex-wrap items-center gap-2'})
+        nav.append(ol)
+
+        # Home > Title, articles get Home > 教程资源 > Title
+        crumbs = [('/', '首页')]
         if page_type == 'article':
-            # Home > 教程资源 > Title
-            html = f'''
-            <nav aria-label="Breadcrumb" class="text-sm text-slate-400 mb-6">
-                <ol class="flex flex-wrap items-center gap-2">
-                    <li><a href="/" class="hover:text-blue-600 transition-colors">首页</a></li>
-                    <li>/</li>
-                    <li><a href="/blog/" class="hover:text-blue-600 transition-colors">教程资源</a></li>
-                    <li>/</li>
-                    <li><span class="text-slate-200">{title}</span></li>
-                </ol>
-            </nav>
-            '''
-        else:
-            # Home > Title
-            html = f'''
-            <nav aria-label="Breadcrumb" class="text-sm text-slate-400 mb-6">
-                <ol class="flex flex-wrap items-center gap-2">
-                    <li><a href="/" class="hover:text-blue-600 transition-colors">首页</a></li>
-                    <li>/</li>
-                    <li><span class="text-slate-200">{title}</span></li>
-                </ol>
-            </nav>
-            '''
-        return html
+            crumbs.append(('/blog/', '教程资源'))
+        for href, label in crumbs:
+            li = soup.new_tag('li')
+            li.append(self._new_tag(soup, 'a', {'href': href, 'class': link_cls}, label))
+            ol.append(li)
+            ol.append(self._new_tag(soup, 'li', {}, '/'))
+
+        li = soup.new_tag('li')
+        li.append(self._new_tag(soup, 'span', {'class': 'text-slate-200'}, title))
+        ol.append(li)
+        return nav
+
+    def generate_related_posts(self, soup, recs):
+        """Build the 推荐阅读 block for an article as nodes of `soup`"""
+        block = self._new_tag(soup, 'div', {'id': 'related-posts', 'class': 'mt-16 pt-10 border-t border-white/5'})
+        block.append(self._new_tag(soup, 'h3', {'class': 'text-xl font-bold text-white mb-6'}, '推荐阅读'))
+        grid = self._new_tag(soup, 'div', {'class': 'grid grid-cols-1 md:grid-cols-2 gap-6 not-prose'})
+        block.append(grid)
+
+        for r in recs:
+            link = self._new_tag(soup, 'a', {'class': 'block group', 'href': r['url']})
+            card = self._new_tag(soup, 'div', {'class': 'bg-white/5 border border-white/10 rounded-xl p-5 hover:bg-white/10 hover:border-violet-500/30 transition-all h-full'})
+            card.append(self._new_tag(soup, 'h4', {'class': 'text-slate-200 font-bold mb-2 group-hover:text-violet-300 transition-colors line-clamp-1'}, r['title']))
+            card.append(self._new_tag(soup, 'p', {'class': 'text-xs text-slate-500 line-clamp-2'}, r['desc']))
+            link.append(card)
+            grid.append(link)
+        return block
 
     def generate_schema(self, page):
         """Generate JSON-LD Schema based on page type"""
@@ -280,195 +448,209 @@ class StaticSiteBuilder:
                     ]
                 }
             }
-        return json.dumps(schema, ensure_ascii=False, indent=4)
+        return json.dumps(schema, ensure_ascii=False, separators=(',', ':'))
 
     def generate_card_html(self, page):
         """Generate a card HTML for the article (for Index/List pages)"""
-        # Simple random icon logic
-        icons = ["💎", "🚀", "⚖️", "🎨", "📝", "🔥"]
-        icon = icons[hash(page['title']) % len(icons)]
-        
-        colors = ["violet", "fuchsia", "blue", "emerald", "amber", "indigo"]
-        color = colors[hash(page['title']) % len(colors)]
-        
-        html = f'''
-        <article class="glass-card rounded-2xl overflow-hidden group hover:border-{color}-500/50 transition-all duration-300">
-            <div class="h-48 bg-gradient-to-br from-{color}-900/50 to-slate-900 flex items-center justify-center relative overflow-hidden">
-                <div class="absolute inset-0 bg-[url('data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAiIGhlaWdodD0iMjAiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+PGNpcmNsZSBjeD0iMSIgY3k9IjEiIHI9IjEiIGZpbGw9InJnYmEoMjU1LDI1NSwyNTUsMC4xKSIvPjwvc3ZnPg==')] opacity-30"></div>
-                <div class="w-16 h-16 bg-{color}-600/20 rounded-2xl flex items-center justify-center text-{color}-400 text-3xl group-hover:scale-110 transition-transform duration-300">
-                    {icon}
-                </div>
-            </div>
-            <div class="p-6">
-                <div class="flex items-center gap-2 mb-4 text-xs font-bold uppercase tracking-wider text-{color}-400">
-                    <span>Article</span>
-                    <span class="w-1 h-1 rounded-full bg-slate-600"></span>
-                    <span>{page['date'].strftime('%Y-%m-%d')}</span>
-                </div>
-                <h3 class="text-xl font-bold text-white mb-3 group-hover:text-{color}-300 transition-colors">
-                    <a href="{page['url']}">{page['h1']}</a>
-                </h3>
-                <p class="text-slate-400 text-sm mb-6 line-clamp-2">
-                    {page['desc']}
-                </p>
-                <a href="{page['url']}" class="inline-flex items-center text-sm font-bold text-white hover:text-{color}-400 transition-colors">
-                    阅读全文
-                    <svg class="w-4 h-4 ml-1 transition-transform group-hover:translate-x-1" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M17 8l4 4m0 0l-4 4m4-4H3"></path></svg>
-                </a>
-            </div>
-        </article>
-        '''
-        return html
+        return _CARD_TMPL.format_map({
+            'color': page['color'],
+            'icon': page['icon'],
+            'date': page['date'].strftime('%Y-%m-%d'),
+            'url': page['url'],
+            'h1': page['h1'],
+            'desc': page['desc'],
+        })
+
+    def _cleanup(self, soup):
+        """
+        Remove previously injected elements in a single walk over the tree:
+        header (first top-level nav, else header), footer, head ld+json schema,
+        breadcrumbs and related posts. Matches are collected first and
+        decomposed afterwards, since the tree can't change while we walk it.
+        """
+        body, head = soup.body, soup.head
+        first_nav = first_header = footer = related = None
+        doomed = []
+
+        for tag in soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            name = tag.name
+
+            # Layout: direct children of <body> only
+            if body is not None and tag.parent is body:
+                if name == 'nav' and first_nav is None:
+                    first_nav = tag
+                elif name == 'header' and first_header is None:
+                    first_header = tag
+                elif name == 'footer' and footer is None:
+                    footer = tag
+
+            if name == 'nav' and tag.get('aria-label') in ('Breadcrumb', 'breadcrumb'):
+                doomed.append(tag)
+            elif name == 'script' and tag.get('type') == 'application/ld+json':
+                if head is not None and tag.find_parent('head') is head:
+                    doomed.append(tag)
+            elif name == 'div' and related is None and tag.get('id') == 'related-posts':
+                related = tag
+            elif name == 'h3' and tag.get_text().strip() == "推荐阅读":
+                # Fallback cleanup for related blocks without the id
+                parent = tag.find_parent('div')
+                if parent: doomed.append(parent)
+
+        doomed.extend(t for t in (first_nav or first_header, footer, related) if t is not None)
+        for tag in doomed:
+            # Skip nodes that went away with an already-removed ancestor
+            if not tag.decomposed:
+                tag.decompose()
+
+    def _template_hash(self):
+        """
+        Fingerprint of everything a page's output depends on besides its own file:
+        header/footer, this script, and the article metadata used for related posts.
+        """
+        h = hashlib.sha256()
+        h.update(str(self.header_html).encode('utf-8'))
+        h.update(str(self.footer_html).encode('utf-8'))
+        h.update(Path(__file__).read_bytes())
+        for p in self.pages:
+            if p['type'] == 'article':
+                h.update(json.dumps([p['url'], p['title'], p['desc'], p['keywords']], ensure_ascii=False).encode('utf-8'))
+        return h.hexdigest()
+
+    def _load_build_cache(self):
+        try:
+            with open(self.root_dir / BUILD_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_build_cache(self, cache):
+        with open(self.root_dir / BUILD_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
 
     def process_pages(self):
-        """Process each page (Article or Root Page)"""
+        """Process each page (Article or Root Page), skipping pages unchanged since the last build"""
         self.log("开始处理所有页面...")
         
+        cache = self._load_build_cache()
+        template_hash = self._template_hash()
+        
+        todo = []
         for page in self.pages:
             file_path = page['path']
-            page_type = page['type']
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            soup = BeautifulSoup(content, 'html.parser')
+            cache_key = file_path.relative_to(self.root_dir).as_posix()
             
-            # === 1. Clean Up (清洗旧元素) ===
-            
-            # Remove Header
-            if soup.body:
-                first_nav = soup.body.find('nav', recursive=False)
-                if not first_nav:
-                     first_nav = soup.body.find('header', recursive=False)
-                if first_nav:
-                    first_nav.decompose()
-
-            # Remove Footer
-            if soup.body:
-                footer_tag = soup.body.find('footer', recursive=False)
-                if footer_tag:
-                    footer_tag.decompose()
-
-            # Remove Schema
-            if soup.head:
-                for s in soup.head.find_all('script', type='application/ld+json'):
-                    s.decompose()
-
-            # Remove Old Breadcrumbs
-            for nav in soup.find_all('nav', attrs={'aria-label': 'Breadcrumb'}):
-                nav.decompose()
-            for nav in soup.find_all('nav', attrs={'aria-label': 'breadcrumb'}):
-                nav.decompose()
-
-            # Remove Old Related Posts (Strict Cleaning for ALL pages first)
-            related_div = soup.find('div', id='related-posts')
-            if related_div:
-                related_div.decompose()
-            
-            # Fallback cleanup
-            for h3 in soup.find_all('h3'):
-                if h3.get_text().strip() == "推荐阅读":
-                    parent = h3.find_parent('div')
-                    if parent: parent.decompose()
-
-            # === 2. Inject New Elements (注入新元素) ===
-
-            # A. Layout Sync (Common for all types)
-            if self.header_html:
-                if soup.body: soup.body.insert(0, self.header_html)
-            if self.footer_html:
-                if soup.body: soup.body.append(self.footer_html)
-
-            # B. Breadcrumbs
-            main = soup.find('main') or soup.find('article')
-            if main:
-                bread_html = self.generate_breadcrumb_html(page['title'], page_type)
-                bread_soup = BeautifulSoup(bread_html, 'html.parser')
-                main.insert(0, bread_soup)
-
-            # C. Schema Injection
-            new_schema = soup.new_tag('script', type='application/ld+json')
-            new_schema.string = self.generate_schema(page)
-            if soup.head: soup.head.append(new_schema)
-
-            # D. Visual Related Posts (ONLY for Articles)
-            if page_type == 'article':
-                recs = self.get_related_posts(page, limit=2)
-                if recs:
-                    rec_items_html = ""
-                    for r in recs:
-                        rec_items_html += f'''
-                        <a class="block group" href="{r['url']}">
-                            <div class="bg-white/5 border border-white/10 rounded-xl p-5 hover:bg-white/10 hover:border-violet-500/30 transition-all h-full">
-                                <h4 class="text-slate-200 font-bold mb-2 group-hover:text-violet-300 transition-colors line-clamp-1">
-                                    {r['title']}
-                                </h4>
-                                <p class="text-xs text-slate-500 line-clamp-2">
-                                    {r['desc']} 
-                                </p>
-                            </div>
-                        </a>
-                        '''
-                    
-                    related_html = f'''
-                    <div id="related-posts" class="mt-16 pt-10 border-t border-white/5">
-                        <h3 class="text-xl font-bold text-white mb-6">推荐阅读</h3>
-                        <div class="grid grid-cols-1 md:grid-cols-2 gap-6 not-prose">
-                            {rec_items_html}
-                        </div>
-                    </div>
-                    '''
-                    
-                    target_container = soup.find('article')
-                    if target_container:
-                        target_container.append(BeautifulSoup(related_html, 'html.parser'))
-                    elif main:
-                        main.append(BeautifulSoup(related_html, 'html.parser'))
-            
-            # For Type 'page', we intentionally DO NOT add related posts (and we already cleaned them)
+            # Incremental: source untouched since we last wrote it and nothing it depends on changed
+            if cache.get(cache_key) == [page['mtime_ns'], template_hash]:
+                self.log(f"⏭️ 未变化，跳过 [{page['type'].upper()}]: {file_path.name}")
+                continue
+            todo.append(page)
+        
+        # Related posts need the whole page list, so compute them here rather than in the workers
+        recs_list = [self.get_related_posts(page, limit=2) for page in todo]
+        
+        if len(todo) >= PARALLEL_MIN_PAGES:
+            initargs = (str(self.root_dir),
+                        str(self.header_html) if self.header_html else None,
+                        str(self.footer_html) if self.footer_html else None)
+            with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(todo)), initializer=_init_worker, initargs=initargs) as executor:
+                mtimes = list(executor.map(_process_one, todo, recs_list))
+        else:
+            mtimes = [self._render_page(page, recs) for page, recs in zip(todo, recs_list)]
+        
+        for page, mtime_ns in zip(todo, mtimes):
+            file_path = page['path']
+            cache[file_path.relative_to(self.root_dir).as_posix()] = [mtime_ns, template_hash]
+            self.log(f"✅ 已处理 [{page['type'].upper()}]: {file_path.name}")
+
+        self._save_build_cache(cache)
+
+    def _render_page(self, page, recs):
+        """Rewrite a single page in place and return its new mtime_ns"""
+        file_path = page['path']
+        page_type = page['type']
+        
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        
+        soup = BeautifulSoup(content, 'lxml', from_encoding='utf-8')
+        
+        # === 1. Clean Up (清洗旧元素) ===
+        self._cleanup(soup)
+
+        # === 2. Inject New Elements (注入新元素) ===
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(str(soup))
-            self.log(f"✅ 已处理 [{page_type.upper()}]: {file_path.name}")
+        # A. Layout Sync (Common for all types)
+        # Insert clones: inserting the template node itself would move it out of the previous tree
+        if self.header_html:
+            if soup.body: soup.body.insert(0, copy.copy(self.header_html))
+        if self.footer_html:
+            if soup.body: soup.body.append(copy.copy(self.footer_html))
+
+        # B. Breadcrumbs
+        main = soup.find('main') or soup.find('article')
+        if main:
+            main.insert(0, self.generate_breadcrumb(soup, page['title'], page_type))
+
+        # C. Schema Injection
+        new_schema = soup.new_tag('script', type='application/ld+json')
+        new_schema.string = self.generate_schema(page)
+        if soup.head: soup.head.append(new_schema)
+
+        # D. Visual Related Posts (ONLY for Articles)
+        if page_type == 'article' and recs:
+            target_container = soup.find('article') or main
+            if target_container:
+                target_container.append(self.generate_related_posts(soup, recs))
+        
+        # For Type 'page', we intentionally DO NOT add related posts (and we already cleaned them)
+
+        _atomic_write_if_changed(file_path, soup.encode('utf-8', formatter='minimal'))
+        return file_path.stat().st_mtime_ns
 
     def update_home_page(self):
         """Update index.html with latest articles"""
         self.log("更新首页...")
         source_path = self.root_dir / SOURCE_FILE
-        if not source_path.exists(): return
-        
-        with open(source_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
+        soup = self._index_soup
+        if soup is None:
+            try:
+                with open(source_path, 'rb') as f:
+                    soup = BeautifulSoup(f, 'lxml', from_encoding='utf-8')
+            except FileNotFoundError:
+                return
         
         blog_section = soup.find(id='blog')
         if not blog_section:
             self.log("警告: 首页未找到 id='blog' 的区域")
             return
             
-        grid = blog_section.find('div', class_=re.compile(r'grid'))
+        grid = blog_section.find('div', class_=_GRID_RE)
         if grid:
             grid.clear()
             # Filter only articles for home page
             articles = [p for p in self.pages if p['type'] == 'article']
-            for page in articles[:3]:
-                card_html = self.generate_card_html(page)
-                grid.append(BeautifulSoup(card_html, 'html.parser'))
+            # Parse all cards as one fragment instead of one parse per card
+            cards_html = ''.join(self.generate_card_html(page) for page in articles[:3])
+            grid.append(BeautifulSoup(cards_html, 'html.parser'))
                 
-            with open(source_path, 'w', encoding='utf-8') as f:
-                f.write(str(soup))
-            self.log("首页最新文章已更新")
+            if _atomic_write_if_changed(source_path, soup.encode('utf-8', formatter='minimal')):
+                self.log("首页最新文章已更新")
+            else:
+                self.log("首页无变化，跳过写入")
             
     def update_blog_index(self):
         """Update blog/index.html with ALL articles"""
         self.log("更新聚合页...")
         index_path = self.root_dir / BLOG_DIR / "index.html"
-        if not index_path.exists():
+        try:
+            with open(index_path, 'rb') as f:
+                soup = BeautifulSoup(f, 'lxml', from_encoding='utf-8')
+        except FileNotFoundError:
             self.log(f"聚合页 {index_path} 不存在")
             return
 
-        with open(index_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-
         # === Layout Sync (Header/Footer) ===
         # Remove Header
         if soup.body:
@@ -486,22 +668,21 @@ class StaticSiteBuilder:
 
         # Inject New Header/Footer
         if self.header_html:
-            if soup.body: soup.body.insert(0, self.header_html)
+            if soup.body: soup.body.insert(0, copy.copy(self.header_html))
         if self.footer_html:
-            if soup.body: soup.body.append(self.footer_html)
+            if soup.body: soup.body.append(copy.copy(self.footer_html))
             
         # Find grid
-        grid = soup.find('div', class_=re.compile(r'grid-cols-1.*lg:grid-cols-3'))
+        grid = soup.find('div', class_=_GRID_INDEX_RE)
         if not grid:
-            grids = soup.find_all('div', class_=re.compile(r'grid'))
+            grids = soup.find_all('div', class_=_GRID_RE)
             if grids: grid = grids[-1]
             
         if grid:
             grid.clear()
             articles = [p for p in self.pages if p['type'] == 'article']
-            for page in articles:
-                card_html = self.generate_card_html(page)
-                grid.append(BeautifulSoup(card_html, 'html.parser'))
+            cards_html = ''.join(self.generate_card_html(page) for page in articles)
+            grid.append(BeautifulSoup(cards_html, 'html.parser'))
 
         # Update Schema
         old_schema = soup.find('script', type='application/ld+json')
@@ -547,35 +728,38 @@ class StaticSiteBuilder:
             })
             
         new_schema = soup.new_tag('script', type='application/ld+json')
-        new_schema.string = json.dumps(schema, ensure_ascii=False, indent=4)
+        new_schema.string = json.dumps(schema, ensure_ascii=False, separators=(',', ':'))
         if soup.head: soup.head.append(new_schema)
         
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
-        self.log("聚合页已更新")
+        if _atomic_write_if_changed(index_path, soup.encode('utf-8', formatter='minimal')):
+            self.log("聚合页已更新")
+        else:
+            self.log("聚合页无变化，跳过写入")
 
     def generate_sitemap(self):
         """Generate sitemap.xml"""
         self.log("生成 sitemap.xml...")
         sitemap_path = self.root_dir / "sitemap.xml"
         
-        xml_content = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        # Listing pages change when an article does, so date them by the newest article rather than today
+        # (otherwise the sitemap differs every day even when nothing was rebuilt)
+        listing_date = max((p['date'] for p in self.pages if p['type'] == 'article'), default=datetime.date.today())
+        listing_lastmod = listing_date.strftime('%Y-%m-%d')
+        
+        urlset = ET.Element('urlset', xmlns='http://www.sitemaps.org/schemas/sitemap/0.9')
+        
+        def add_url(loc, lastmod, changefreq, priority):
+            url = ET.SubElement(urlset, 'url')
+            ET.SubElement(url, 'loc').text = loc
+            ET.SubElement(url, 'lastmod').text = lastmod
+            ET.SubElement(url, 'changefreq').text = changefreq
+            ET.SubElement(url, 'priority').text = priority
         
         # Add Homepage
-        xml_content.append(f'''  <url>
-    <loc>{BASE_URL}/</loc>
-    <lastmod>{datetime.date.today().isoformat()}</lastmod>
-    <changefreq>weekly</changefreq>
-    <priority>1.0</priority>
-  </url>''')
+        add_url(f"{BASE_URL}/", listing_lastmod, "weekly", "1.0")
 
         # Add Blog Index
-        xml_content.append(f'''  <url>
-    <loc>{BASE_URL}/blog/</loc>
-    <lastmod>{datetime.date.today().isoformat()}</lastmod>
-    <changefreq>weekly</changefreq>
-    <priority>0.9</priority>
-  </url>''')
+        add_url(f"{BASE_URL}/blog/", listing_lastmod, "weekly", "0.9")
 
         # Add all pages
         for page in self.pages:
@@ -594,17 +778,16 @@ class StaticSiteBuilder:
             full_url = f"{BASE_URL}{page['url']}"
             date_str = page['date'].strftime('%Y-%m-%d')
             
-            xml_content.append(f'''  <url>
-    <loc>{full_url}</loc>
-    <lastmod>{date_str}</lastmod>
-    <changefreq>{changefreq}</changefreq>
-    <priority>{priority}</priority>
-  </url>''')
-            
-        xml_content.append('</urlset>')
+            add_url(full_url, date_str, changefreq, priority)
+        
+        # ElementTree escapes text (& < >) that the old f-strings wrote raw
+        ET.indent(urlset, space='  ')
+        new_content = b'<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(urlset, encoding='utf-8')
         
-        with open(sitemap_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(xml_content))
+        # Skip the write when neither the page list nor any date changed
+        if not _atomic_write_if_changed(sitemap_path, new_content):
+            self.log("Sitemap 无变化，跳过写入")
+            return
             
         self.log(f"✅ Sitemap 已更新: {len(self.pages) + 2} 个链接")
 
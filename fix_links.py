@@ -1,4 +1,6 @@
 import os
+import re
+import shutil
 from pathlib import Path
 from bs4 import BeautifulSoup
 
@@ -8,17 +10,95 @@ IGNORE_DIRS = ['.git', 'node_modules', '__pycache__']
 # 你的 Base URL (可选，用于处理 absolute URLs 如果需要)
 BASE_URL = "https://mjmai.top"
 
+# <a ... href="..."> / <a ... href='...'>，直接在字节上替换，不构建 DOM
+# 属性前缀按引号跳过，这样 title="a>b" 里的 > 不会截断标签
+_ATTRS = rb'''(?:[^>"']|"[^"]*"|'[^']*')*?'''
+HREF_RE = re.compile(rb'''(<a\s(?:''' + _ATTRS + rb'''\s)?href\s*=\s*)(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+# 没有引号的 href (如 <a href=foo.html>) 交给 BeautifulSoup 处理
+UNQUOTED_HREF_RE = re.compile(rb'''<a\s(?:''' + _ATTRS + rb'''\s)?href\s*=\s*[^\s"'>]''', re.IGNORECASE)
+# 注释和 script/style/textarea 等原始文本区域里的 "<a ..." 不是标签，正则分不清，也交给 BeautifulSoup
+RAW_TEXT_RE = re.compile(
+    rb'''<!--.*?(?:-->|\Z)|<(script|style|textarea|title|xmp|iframe|noembed|noframes|noscript)\b.*?(?:</\1\s*>|\Z)''',
+    re.IGNORECASE | re.DOTALL)
+A_TAG_RE = re.compile(rb'<a\s', re.IGNORECASE)
+
+def _fix_href(href, base_prefix):
+    """返回修正后的 href (无需修改时原样返回)"""
+    # 1. 跳过已经是绝对路径、外部链接或锚点
+    if href.startswith(('/', 'http', '#', 'mailto:', 'tel:', 'javascript:')):
+        return href
+    
+    # 2. 计算绝对路径
+    # 逻辑：当前目录前缀 + 相对链接
+    new_href = base_prefix + href
+    
+    # 3. 清理 .html 后缀 (Cloudflare Clean URL)
+    if new_href.endswith('.html'):
+        new_href = new_href[:-5]
+    
+    # 4. 清理 index 结尾
+    if new_href.endswith('/index'):
+        new_href = new_href[:-6] + '/'
+
+    # 5. 去重多余的斜杠 (例如 /blog//abc -> /blog/abc)
+    return new_href.replace('//', '/')
+
+def _rewrite_with_soup(data, base_prefix):
+    """兜底：用 BeautifulSoup 重写整页"""
+    soup = BeautifulSoup(data, 'lxml', from_encoding='utf-8')
+    modified = False
+    for a in soup.find_all('a', href=True):
+        new_href = _fix_href(a['href'], base_prefix)
+        if a['href'] != new_href:
+            a['href'] = new_href
+            modified = True
+    return soup.encode('utf-8', formatter='minimal') if modified else data
+
+def _needs_soup(data):
+    """正则替换不安全的页面：有无引号的 href，或原始文本区域里出现了 <a"""
+    if UNQUOTED_HREF_RE.search(data):
+        return True
+    return any(A_TAG_RE.search(m.group(0)) for m in RAW_TEXT_RE.finditer(data))
+
+def _atomic_write_if_changed(path, new_bytes):
+    """内容不同时才写入：先写临时文件再原子替换，中断时不会留下写了一半的页面。返回是否写入"""
+    exists = True
+    try:
+        if path.read_bytes() == new_bytes:
+            return False
+    except FileNotFoundError:
+        exists = False
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    try:
+        tmp.write_bytes(new_bytes)
+        # 保留原文件权限 (临时文件按 umask 创建)
+        if exists:
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+def _walk_html(root):
+    """递归列出目标文件；目录类型来自 readdir 的 d_type，不额外 stat"""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in IGNORE_DIRS:
+                    continue
+                yield from _walk_html(entry.path)
+            elif entry.name.endswith(tuple(TARGET_EXT)):
+                yield entry.path
+
 def fix_all_internal_links(root_dir='.'):
     root_path = Path(root_dir).resolve()
     count = 0
     
     print(f"🚀 开始全站链接绝对化修复: {root_path}")
 
-    for file_path in root_path.rglob('*'):
-        if file_path.is_dir() or file_path.suffix not in TARGET_EXT:
-            continue
-        if any(part in str(file_path) for part in IGNORE_DIRS):
-            continue
+    for path in _walk_html(root_path):
+        file_path = Path(path)
             
         # 计算当前文件相对于根目录的“深度前缀”
         # 例如: 文件在 /blog/a.html，相对路径链接 'b.html' -> 应该变成 '/blog/b'
@@ -28,41 +108,24 @@ def fix_all_internal_links(root_dir='.'):
         # 修正：如果 base_prefix 是 "//" (根目录情况), 改为 "/"
         if base_prefix == "//": base_prefix = "/"
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-        
-        modified = False
+        with open(file_path, 'rb') as f:
+            data = f.read()
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            
-            # 1. 跳过已经是绝对路径、外部链接或锚点
-            if href.startswith(('/', 'http', '#', 'mailto:', 'tel:', 'javascript:')):
-                continue
-            
-            # 2. 计算绝对路径
-            # 逻辑：当前目录前缀 + 相对链接
-            new_href = base_prefix + href
-            
-            # 3. 清理 .html 后缀 (Cloudflare Clean URL)
-            if new_href.endswith('.html'):
-                new_href = new_href[:-5]
-            
-            # 4. 清理 index 结尾
-            if new_href.endswith('/index'):
-                new_href = new_href[:-6] + '/'
-
-            # 5. 去重多余的斜杠 (例如 /blog//abc -> /blog/abc)
-            new_href = new_href.replace('//', '/')
-            
-            if href != new_href:
+        if _needs_soup(data):
+            new_data = _rewrite_with_soup(data, base_prefix)
+        else:
+            def repl(m):
+                quote = b'"' if m.group(2) is not None else b"'"
+                href = (m.group(2) if m.group(2) is not None else m.group(3)).decode('utf-8')
+                new_href = _fix_href(href, base_prefix)
+                if new_href == href:
+                    return m.group(0)
                 # print(f"   [修复] {file_path.name}: {href} -> {new_href}")
-                a['href'] = new_href
-                modified = True
+                return m.group(1) + quote + new_href.encode('utf-8') + quote
+            new_data = HREF_RE.sub(repl, data)
 
-        if modified:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(str(soup))
+        # 只在内容真正变化时写回
+        if new_data != data and _atomic_write_if_changed(file_path, new_data):
             count += 1
             print(f"✅ 已修正文件: {file_path.name}")
 
@@ -1,6 +1,8 @@
 import requests
 import xml.etree.ElementTree as ET
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # 配置信息
 HOST = "mjmai.top"
@@ -8,19 +10,20 @@ KEY = "d18753b123184422bd671c0d6263beff"
 KEY_LOCATION = f"https://{HOST}/{KEY}.txt"
 SITEMAP_FILE = "sitemap.xml"
 INDEXNOW_ENDPOINT = "https://api.indexnow.org/indexnow"
+BATCH_SIZE = 10000  # IndexNow 单次请求最多 10000 个 URL
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
 
 def get_urls_from_sitemap(sitemap_path):
     """从 sitemap.xml 提取所有 URL"""
     try:
-        tree = ET.parse(sitemap_path)
-        root = tree.getroot()
-        # sitemap 命名空间
-        namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+        # 流式解析：每个 </url> 结束时取出 loc 并释放节点，不构建整棵树
         urls = []
-        for url in root.findall('ns:url', namespace):
-            loc = url.find('ns:loc', namespace)
-            if loc is not None:
-                urls.append(loc.text)
+        for _, elem in ET.iterparse(sitemap_path, events=('end',)):
+            if elem.tag == SITEMAP_NS + 'url':
+                loc = elem.find(SITEMAP_NS + 'loc')
+                if loc is not None:
+                    urls.append(loc.text)
+                elem.clear()
         return urls
     except Exception as e:
         print(f"读取 sitemap 失败: {e}")
@@ -32,6 +35,22 @@ def push_to_indexnow(urls):
         print("没有找到需要推送的 URL")
         return
 
+    headers = {
+        "Content-Type": "application/json; charset=utf-8"
+    }
+
+    # 复用连接；IndexNow 的提交是幂等的，5xx/429 时可以安全重试 POST
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['POST']), raise_on_status=False)
+    with requests.Session() as session:
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+        session.headers.update(headers)
+
+        for start in range(0, len(urls), BATCH_SIZE):
+            push_batch(session, urls[start:start + BATCH_SIZE])
+
+def push_batch(session, urls):
+    """推送一批 (不超过 BATCH_SIZE 个) URL"""
     payload = {
         "host": HOST,
         "key": KEY,
@@ -39,12 +58,8 @@ def push_to_indexnow(urls):
         "urlList": urls
     }
 
-    headers = {
-        "Content-Type": "application/json; charset=utf-8"
-    }
-
     try:
-        response = requests.post(INDEXNOW_ENDPOINT, data=json.dumps(payload), headers=headers)
+        response = session.post(INDEXNOW_ENDPOINT, data=json.dumps(payload))
         
         # IndexNow 返回 200 或 202 都表示请求已被接收
         if response.status_code in [200, 202]: